@@ -7,9 +7,25 @@ Copyright (C) 2023 NuMat Technologies
 from __future__ import annotations
 
 import asyncio
+import re
+from time import monotonic
 from typing import Any, ClassVar
 
-from .util import Client, SerialClient, TcpClient, _is_float
+from .util import _FLOAT_RE, Client, SerialClient, TcpClient
+
+# Trailing status tags on a data frame: over range errors for mass, volume,
+# pressure, and temperature, plus the button-lock indicator.
+_STATUS_TAGS = frozenset(('MOV', 'VOV', 'POV', 'TOV', 'LCK'))
+
+# 'host:port' addresses are TCP; anything else (/dev/*, COM*, socat pseudo
+# terminals, symlinks) is treated as a serial port.
+_TCP_ADDR_RE = re.compile(r'^[^/:\s]+:\d+$')
+
+# Generous bound on a data-frame or register-read response, used to derive
+# tight read deadlines for polling commands. Commands with device-side
+# processing delays (EEPROM writes, tares) pass no hint and keep the
+# configured worst-case timeout.
+_POLL_RESPONSE_BYTES = 64
 
 
 class FlowMeter:
@@ -29,6 +45,14 @@ class FlowMeter:
                              'C2H4', 'i-C2H10', 'Kr', 'Xe', 'SF6', 'C-25', 'C-10',
                              'C-8', 'C-2', 'C-75', 'A-75', 'A-25', 'A1025', 'Star29',
                              'P-5']
+    # gas name -> gas number, precomputed for O(1) lookups
+    _gas_index: ClassVar[dict[str, int]] = {g: i for i, g in enumerate(gases)}
+    # whether the firmware supports COMPOSER gas mixes; set by get_firmware
+    _supports_composer: bool | None = None
+    # when button_lock was last refreshed by get(), and how long it stays
+    # fresh enough for is_locked to reuse
+    _button_lock_time: float = float('-inf')
+    _button_lock_ttl: float = 0.05
 
     def __init__(self, address: str = '/dev/ttyUSB0', unit: str = 'A', **kwargs: Any) -> None:
         """Connect this driver with the appropriate USB / serial port.
@@ -37,23 +61,34 @@ class FlowMeter:
             address: The serial port or TCP address:port. Default '/dev/ttyUSB0'.
             unit: The Alicat-specified unit ID, A-Z. Default 'A'.
         """
-        if address.startswith('/dev') or address.startswith('COM'):  # serial
-            if address in FlowMeter.open_ports:
-                # Reuse existing connection
-                self.hw, refcount = FlowMeter.open_ports[address]
-                FlowMeter.open_ports[address] = (self.hw, refcount + 1)
-            else:
-                # Open a new connection and store it
-                self.hw: Client = SerialClient(address=address, **kwargs)  # type: ignore[no-redef]
-                FlowMeter.open_ports[address] = (self.hw, 1)
+        if _TCP_ADDR_RE.match(address):
+            self.hw: Client = TcpClient(address=address, **kwargs)
+        elif address in FlowMeter.open_ports:
+            # Reuse existing connection
+            self.hw, refcount = FlowMeter.open_ports[address]
+            FlowMeter.open_ports[address] = (self.hw, refcount + 1)
         else:
-            self.hw = TcpClient(address=address, **kwargs)
+            # Open a new connection and store it
+            self.hw = SerialClient(address=address, **kwargs)
+            FlowMeter.open_ports[address] = (self.hw, 1)
 
         self.unit = unit
         self.keys = ['pressure', 'temperature', 'volumetric_flow', 'mass_flow',
                      'setpoint', 'gas']
         self.open = True
         self.firmware: str | None = None
+        # Invariant commands, pre-encoded once so repeated calls skip
+        # f-string formatting and encoding.
+        self._cmd_get = self._encode(unit)
+        self._cmd_lock = self._encode(f'{unit}$$L')
+        self._cmd_unlock = self._encode(f'{unit}$$U')
+        self._cmd_tare_pressure = self._encode(f'{unit}$$PC')
+        self._cmd_tare_volumetric = self._encode(f'{unit}$$V')
+        self._cmd_reset_totalizer = self._encode(f'{unit}T')
+
+    def _encode(self, command: str) -> bytes:
+        """Encode a command with the client's line terminator."""
+        return command.encode() + self.hw.eol
 
     async def __aenter__(self, *args: Any) -> FlowMeter:
         """Provide async enter to context manager."""
@@ -78,13 +113,18 @@ class FlowMeter:
         try:
             device = cls(port, unit)
             try:
-                c = await device.get()
+                line = await device._ping()
+                assert line
+                values = line.split()[1:]
+                while values and values[-1].upper() in _STATUS_TAGS:
+                    del values[-1]
+                # A meter's frame carries exactly 5 fields; a controller's
+                # adds the setpoint (and possibly a totalizer). Any other
+                # count is an echo or a foreign device, not an Alicat.
                 if cls.__name__ == 'FlowMeter':
-                    assert c
-                    assert 'setpoint' not in device.keys
+                    assert len(values) == 5
                 elif cls.__name__ == 'FlowController':
-                    assert c
-                    assert 'setpoint' in device.keys
+                    assert len(values) in (6, 7)
                 else:
                     raise NotImplementedError('Must be meter or controller.')
                 is_device = True
@@ -94,6 +134,30 @@ class FlowMeter:
             pass
         return is_device
 
+    async def _ping(self) -> str | None:
+        """Query the device's data frame without parsing its fields.
+
+        A cheap aliveness probe for port scanning: returns the raw line
+        when the responding unit ID matches, and None otherwise.
+        """
+        line = await self._write_and_read(self._cmd_get, _POLL_RESPONSE_BYTES)
+        if line and line.split(None, 1)[0] == self.unit:
+            return line
+        return None
+
+    @classmethod
+    async def get_many(cls, devices: list[FlowMeter]) -> list[dict | BaseException]:
+        """Concurrently read the state of multiple devices.
+
+        Devices on independent ports are polled in parallel, so the total
+        latency is roughly one round trip instead of one per device.
+        Devices sharing a port still serialize on the port lock, which
+        keeps multidrop buses safe. Exceptions are returned in place of
+        results rather than raised.
+        """
+        return await asyncio.gather(*(d.get() for d in devices),
+                                    return_exceptions=True)
+
     def _test_controller_open(self) -> None:
         """Raise an IOError if the FlowMeter has been closed.
 
@@ -105,10 +169,11 @@ class FlowMeter:
             raise OSError(f"The FlowMeter with unit ID {self.unit} and "
                           f"port {self.hw.address} is not open")
 
-    async def _write_and_read(self, command: str) -> str | None:
+    async def _write_and_read(self, command: str | bytes,
+                              expected_response_bytes: int | None = None) -> str | None:
         """Wrap the communicator request, to call _test_controller_open() before any request."""
         self._test_controller_open()
-        return await self.hw._write_and_read(command)
+        return await self.hw._write_and_read(command, expected_response_bytes)
 
     async def get(self) -> dict:
         """Get the current state of the flow controller.
@@ -127,31 +192,35 @@ class FlowMeter:
             The state of the flow controller, as a dictionary.
 
         """
-        command = f'{self.unit}'
-        line = await self._write_and_read(command)
+        line = await self._write_and_read(self._cmd_get, _POLL_RESPONSE_BYTES)
         if not line:
             raise OSError("Could not read values")
         spl = line.split()
         unit, values = spl[0], spl[1:]
-
-        # Over range errors for mass, volume, pressure, and temperature
-        # Explicitly silenced because I find it redundant.
-        while values[-1].upper() in ['MOV', 'VOV', 'POV', 'TOV']:
-            del values[-1]
         if unit != self.unit:
             raise ValueError("Flow controller unit ID mismatch.")
-        if values[-1].upper() == 'LCK':
-            self.button_lock = True
+
+        # Trim trailing status tags in one right-to-left pass, uppercasing
+        # each candidate only once. Over range errors for mass, volume,
+        # pressure, and temperature are explicitly silenced because I find
+        # them redundant.
+        self.button_lock = False
+        self._button_lock_time = monotonic()
+        tag = values[-1].upper()
+        while tag in _STATUS_TAGS:
+            if tag == 'LCK':
+                self.button_lock = True
             del values[-1]
-        else:
-            self.button_lock = False
+            tag = values[-1].upper()
         if len(values) == 5 and len(self.keys) == 6:
             del self.keys[-2]
         elif len(values) == 7 and len(self.keys) == 6:
             self.keys.insert(5, 'total flow')
         elif len(values) == 2 and len(self.keys) == 6:
             self.keys.insert(1, 'setpoint')
-        return {k: (float(v) if _is_float(v) else v)
+        # Local bindings keep the hot loop free of attribute lookups.
+        _flt, _m = float, _FLOAT_RE.match
+        return {k: (_flt(v) if _m(v) else v)
                 for k, v in zip(self.keys, values, strict=True)}  # type: ignore[call-overload]
                                                                   # PEP618
     async def set_gas(self, gas: str | int) -> None:
@@ -167,9 +236,9 @@ class FlowMeter:
                 Gas mixes may only be called by their mix number.
         """
         if isinstance(gas, str):
-            if gas not in self.gases:
+            gas_number = self._gas_index.get(gas)
+            if gas_number is None:
                 raise ValueError(f"{gas} not supported!")
-            gas_number = self.gases.index(gas)
         else:
             gas_number = gas
         command = f'{self.unit}$$W46={gas_number}'
@@ -195,8 +264,8 @@ class FlowMeter:
         gases: A dictionary of the gas by name along with the associated
         percentage in the mix.
         """
-        firmware = await self.get_firmware()
-        if any(v in firmware for v in ['2v', '3v', '4v', 'GP']):
+        await self.get_firmware()
+        if not self._supports_composer:
             raise OSError("This unit does not support COMPOSER gas mixes.")
 
         if mix_no < 236 or mix_no > 255:
@@ -206,17 +275,12 @@ class FlowMeter:
         if total_percent != 100:
             raise ValueError("Percentages of gas mix must add to 100%!")
 
-        if any(gas not in self.gases for gas in gases):
+        if any(gas not in self._gas_index for gas in gases):
             raise ValueError("Gas not supported!")
 
-        gas_list = [f'{percent} {self.gases.index(gas)}' for gas, percent in gases.items()]
-        command = ' '.join([
-            self.unit,
-            'GM',
-            name,
-            str(mix_no),
-            ' '.join(gas_list),
-])
+        gas_list = ' '.join(f'{percent} {self._gas_index[gas]}'
+                            for gas, percent in gases.items())
+        command = f'{self.unit} GM {name} {mix_no} {gas_list}'
 
         line = await self._write_and_read(command)
 
@@ -234,39 +298,42 @@ class FlowMeter:
 
     async def lock(self) -> None:
         """Lock the buttons."""
-        command = f'{self.unit}$$L'
-        await self._write_and_read(command)
+        await self._write_and_read(self._cmd_lock)
+        self._button_lock_time = float('-inf')  # force is_locked to re-query
 
     async def unlock(self) -> None:
         """Unlock the buttons."""
-        command = f'{self.unit}$$U'
-        await self._write_and_read(command)
+        await self._write_and_read(self._cmd_unlock)
+        self._button_lock_time = float('-inf')  # force is_locked to re-query
 
     async def is_locked(self) -> bool:
-        """Return whether the buttons are locked."""
-        await self.get()
+        """Return whether the buttons are locked.
+
+        The lock state is only reported as a trailing tag on the full data
+        frame, so this reuses the value cached by a recent get() when one
+        is fresh enough, instead of issuing another full query.
+        """
+        if monotonic() - self._button_lock_time > self._button_lock_ttl:
+            await self.get()
         return self.button_lock
 
     async def tare_pressure(self) -> None:
         """Tare the pressure."""
-        command = f'{self.unit}$$PC'
-        line = await self._write_and_read(command)
+        line = await self._write_and_read(self._cmd_tare_pressure)
 
         if line == '?':
             raise OSError("Unable to tare pressure.")
 
     async def tare_volumetric(self) -> None:
         """Tare volumetric flow."""
-        command = f'{self.unit}$$V'
-        line = await self._write_and_read(command)
+        line = await self._write_and_read(self._cmd_tare_volumetric)
 
         if line == '?':
             raise OSError("Unable to tare flow.")
 
     async def reset_totalizer(self) -> None:
         """Reset the totalizer."""
-        command = f'{self.unit}T'
-        await self._write_and_read(command)
+        await self._write_and_read(self._cmd_reset_totalizer)
 
     async def get_firmware(self) -> str:
         """Get the device firmware version."""
@@ -275,6 +342,10 @@ class FlowMeter:
             self.firmware = await self._write_and_read(command)
         if not self.firmware:
             raise OSError("Unable to get firmware.")
+        if self._supports_composer is None:
+            # COMPOSER mixes require firmware 5v or greater
+            self._supports_composer = not any(v in self.firmware
+                                              for v in ('2v', '3v', '4v', 'GP'))
         return self.firmware
 
     async def flush(self) -> None:
@@ -298,6 +369,8 @@ class FlowMeter:
             else:
                 await connection.close()  # Close the port if no other instance uses it
                 del FlowMeter.open_ports[port]
+        else:
+            await self.hw.close()  # TCP clients are not shared through open_ports
         self.open = False
 
 
@@ -326,6 +399,8 @@ class FlowController(FlowMeter):
             unit: The Alicat-specified unit ID, A-Z. Default 'A'.
         """
         FlowMeter.__init__(self, address, unit, **kwargs)
+        self._cmd_hold = self._encode(f'{unit}$$H')
+        self._cmd_cancel_hold = self._encode(f'{unit}$$C')
         self.control_point = None
         async def _init_control_point() -> None:
             self.control_point = await self._get_control_point()
@@ -335,7 +410,8 @@ class FlowController(FlowMeter):
         """Provide async enter to context manager."""
         return self
 
-    async def _write_and_read(self, command: str) -> str | None:
+    async def _write_and_read(self, command: str | bytes,
+                              expected_response_bytes: int | None = None) -> str | None:
         """Wrap the communicator request.
 
         (1) Ensure _init_task is called once before the first request
@@ -344,7 +420,7 @@ class FlowController(FlowMeter):
         # if 'R122' not in command:
         #     await self._init_task
         self._test_controller_open()
-        return await self.hw._write_and_read(command)
+        return await self.hw._write_and_read(command, expected_response_bytes)
 
     async def get(self) -> dict:
         """Get the current state of the flow controller.
@@ -440,13 +516,11 @@ class FlowController(FlowMeter):
         For a dual valve flow controller, hold the valve at the present value.
         For a dual valve pressure controller, close both valves.
         """
-        command = f'{self.unit}$$H'
-        await self._write_and_read(command)
+        await self._write_and_read(self._cmd_hold)
 
     async def cancel_hold(self) -> None:
         """Cancel valve hold."""
-        command = f'{self.unit}$$C'
-        await self._write_and_read(command)
+        await self._write_and_read(self._cmd_cancel_hold)
 
     async def get_pid(self) -> dict:
         """Read the current PID values on the controller.
@@ -457,7 +531,7 @@ class FlowController(FlowMeter):
         self.pid_keys = ['loop_type', 'P', 'D', 'I']
 
         command = f'{self.unit}$$r85'
-        read_loop_type = await self._write_and_read(command)
+        read_loop_type = await self._write_and_read(command, _POLL_RESPONSE_BYTES)
         if not read_loop_type:
             raise OSError("Could not get PID values.")
         spl = read_loop_type.split()
@@ -465,8 +539,12 @@ class FlowController(FlowMeter):
         loopnum = int(spl[3])
         loop_type = ['PD/PDF', 'PD/PDF', 'PD2I'][loopnum]
         pid_values = [loop_type]
-        for register in range(21, 24):
-            value = await self._write_and_read(f'{self.unit}$$r{register}')
+        registers = range(21, 24)
+        self._test_controller_open()
+        values = await self.hw._write_and_read_many(
+            [f'{self.unit}$$r{register}' for register in registers],
+            _POLL_RESPONSE_BYTES)
+        for register, value in zip(registers, values, strict=True):
             if not value:
                 raise OSError(f"Could not read register {register}")
             value_spl = value.split()
@@ -556,6 +634,8 @@ class FlowController(FlowMeter):
         """
         if point not in self.registers:
             raise ValueError("Control point must be 'flow' or 'pressure'.")
+        if point == self.control_point:
+            return  # already controlling on this point; skip the round trip
         reg = self.registers[point]
         command = f'{self.unit}W122={reg:d}'
         line = await self._write_and_read(command)
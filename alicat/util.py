@@ -8,14 +8,17 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import re
 from abc import ABC, abstractmethod
-from typing import Any
+from contextlib import AbstractAsyncContextManager, nullcontext
 
 import serial
 import serial_asyncio_fast  # type: ignore
 
 logger = logging.getLogger('alicat')
 
+_FLOAT_RE = re.compile(r'^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$')
+
 
 class Client(ABC):
     """Serial or TCP client."""
@@ -27,13 +30,19 @@ class Client(ABC):
     max_timeouts: int
     reconnecting: bool
     eol: bytes
-    lock: asyncio.Lock
+    lock: AbstractAsyncContextManager
 
     reader: asyncio.StreamReader
     writer: asyncio.StreamWriter
 
-    def __init__(self, timeout: float):
-        """Initialize common attributes."""
+    def __init__(self, timeout: float, single_owner: bool = False):
+        """Initialize common attributes.
+
+        With `single_owner=True`, commands are not serialized against
+        concurrent callers: the per-command lock becomes a no-op context
+        manager, skipping the acquire/release round trip. Only safe when
+        a single task talks to the client.
+        """
         self.address = ''
         self.open = False
         self.timeout = timeout
@@ -41,37 +50,69 @@ class Client(ABC):
         self.max_timeouts = 10
         self.reconnecting = False
         self.eol = b'\r'
-        self.lock = asyncio.Lock()
+        self.lock = nullcontext() if single_owner else asyncio.Lock()
+        # always a real lock, as reconnecting mutates reader/writer
+        self._connection_lock = asyncio.Lock()
+        # reusable receive buffer for _readline
+        self._rxbuf = bytearray()
 
-    async def _write(self, message: str) -> None:
+    async def _write(self, message: str | bytes) -> None:
         """Write a command and do not expect a response.
 
+        Pre-encoded `bytes` (terminator included) are written as-is, so
+        callers can cache invariant commands and skip the per-call encode.
+
         As industrial devices are commonly unplugged, this has been expanded to
         handle recovering from disconnects.
         """
-        self.writer.write(message.encode() + self.eol)
+        raw = message if isinstance(message, bytes) else message.encode() + self.eol
+        self.writer.write(raw)
 
     async def _read(self, length: int) -> str:
         """Read a fixed number of bytes from the device."""
         response = await self.reader.read(length)
-        return response.decode().strip()
+        return response.translate(None, b'\x00').strip().decode('ascii')
 
     async def _readline(self) -> str:
-        """Read until a LF terminator."""
-        response = await self.reader.readuntil(self.eol)
-        return response.decode().strip().replace('\x00', '')
+        """Read until a LF terminator.
+
+        Lines are extracted from a reusable per-client buffer rather than
+        letting StreamReader.readuntil allocate a fresh bytes object per
+        read, which cuts allocator and GC pressure in polling loops.
 
-    async def _write_and_read(self, command: str) -> str | None:
+        NULs are deleted and whitespace trimmed at the bytes level in a
+        single C pass, rather than chaining str operations after decoding.
+        """
+        buf = self._rxbuf
+        while True:
+            i = buf.find(self.eol)
+            if i >= 0:
+                line = bytes(buf[:i])
+                del buf[:i + len(self.eol)]
+                return line.translate(None, b'\x00').strip().decode('ascii')
+            chunk = await self.reader.read(4096)
+            if not chunk:
+                raise asyncio.IncompleteReadError(bytes(buf), None)
+            buf.extend(chunk)
+
+    async def _write_and_read(self, command: str | bytes,
+                              expected_response_bytes: int | None = None) -> str | None:
         """Write a command and read a response.
 
+        `expected_response_bytes` hints the response size so serial clients
+        can compute a tight read deadline; leave it None for commands with
+        device-side processing delays (EEPROM writes, tares) to wait out
+        the configured worst-case timeout.
+
         As industrial devices are commonly unplugged, this has been expanded to
         handle recovering from disconnects.
         """
-        await self._handle_connection()
+        if not self.open or self.reconnecting:
+            await self._handle_connection()
         async with self.lock:
             if self.open:
                 try:
-                    response = await self._handle_communication(command)
+                    response = await self._handle_communication(command, expected_response_bytes)
                     return response
                 except asyncio.exceptions.IncompleteReadError:
                     logger.error('IncompleteReadError.  Are there multiple connections?')
@@ -79,21 +120,54 @@ class Client(ABC):
             else:
                 return None
 
+    async def _write_and_read_many(self, commands: list[str],
+                                   expected_response_bytes: int | None = None) -> list[str | None]:
+        """Write a batch of commands, reading a response after each.
+
+        Compared to repeated `_write_and_read` calls, this checks the
+        connection and acquires the lock once for the whole batch, so
+        multi-register reads pay the per-command overhead only once.
+        """
+        if not self.open or self.reconnecting:
+            await self._handle_connection()
+        responses: list[str | None] = []
+        async with self.lock:
+            for command in commands:
+                if not self.open:
+                    responses.append(None)
+                    continue
+                try:
+                    responses.append(await self._handle_communication(
+                        command, expected_response_bytes))
+                except asyncio.exceptions.IncompleteReadError:
+                    logger.error('IncompleteReadError.  Are there multiple connections?')
+                    responses.append(None)
+        return responses
+
     async def _clear(self) -> None:
         """Clear the reader stream when it has been corrupted from multiple connections."""
         logger.warning("Multiple connections detected; clearing reader stream.")
+        self._rxbuf.clear()  # drop surplus bytes already pulled from the stream
         try:
-            junk = await asyncio.wait_for(self._read(100), timeout=self.timeout)
+            # Stale bytes arrive well within 50ms even at 19200 baud, so
+            # there is no need to wait out the full worst-case timeout.
+            junk = await asyncio.wait_for(self._read(100), timeout=min(self.timeout, 0.05))
             logger.warning(junk)
         except TimeoutError:
             pass
 
-    async def _handle_communication(self, command: str) -> str | None:
+    def _response_timeout(self, expected_bytes: int | None) -> float:
+        """Return the read deadline for an expected response size."""
+        return self.timeout
+
+    async def _handle_communication(self, command: str | bytes,
+                                    expected_response_bytes: int | None = None) -> str | None:
         """Manage communication, including timeouts and logging."""
         try:
             await self._write(command)
             future = self._readline()
-            result = await asyncio.wait_for(future, timeout=self.timeout)
+            result = await asyncio.wait_for(
+                future, timeout=self._response_timeout(expected_response_bytes))
             self.timeouts = 0
             return result
         except (asyncio.TimeoutError, TypeError, OSError):
@@ -108,9 +182,12 @@ class Client(ABC):
         """Automatically maintain connection."""
         if self.open:
             return
-        async with self.lock:
+        async with self._connection_lock:
+            if self.open:  # re-check; another caller may have reconnected
+                return
             try:
                 self.reader, self.writer = await asyncio.wait_for(self._connect(), timeout=self.timeout)
+                self._rxbuf.clear()  # drop any partial line from a dead connection
                 self.reconnecting = False
             except (asyncio.TimeoutError, OSError):
                 if not self.reconnecting:
@@ -138,9 +215,9 @@ class TcpClient(Client):
 
     port: str
 
-    def __init__(self, address: str, timeout: float = 1.0):
+    def __init__(self, address: str, timeout: float = 1.0, single_owner: bool = False):
         """Communicator using a TCP/IP<=>serial gateway."""
-        super().__init__(timeout)
+        super().__init__(timeout, single_owner)
         try:
             self.address, self.port = address.split(':')
         except ValueError as e:
@@ -161,6 +238,7 @@ class SerialClient(Client):
     bytesize: int
     stopbits: int
     parity: str
+    byte_time: float
 
     def __init__(self,
                  address: str,
@@ -168,9 +246,10 @@ class SerialClient(Client):
                  timeout: float = 10.0,
                  bytesize: int = serial.EIGHTBITS,
                  stopbits: int = serial.STOPBITS_ONE,
-                 parity: str = serial.PARITY_NONE):
+                 parity: str = serial.PARITY_NONE,
+                 single_owner: bool = False):
 
-        super().__init__(timeout)
+        super().__init__(timeout, single_owner)
 
         self.address = address
         assert isinstance(self.address, str)
@@ -179,6 +258,22 @@ class SerialClient(Client):
         self.bytesize = bytesize
         self.stopbits = stopbits
         self.parity = parity
+        # seconds to transmit one byte: start bit + data + parity + stop
+        self.byte_time = (1 + bytesize + stopbits
+                          + (0 if parity == serial.PARITY_NONE else 1)) / baudrate
+
+    def _response_timeout(self, expected_bytes: int | None) -> float:
+        """Scale the read deadline to the line rate.
+
+        At 19200 baud even a long response arrives in tens of milliseconds,
+        so a dropped byte is detected far sooner than the configured
+        worst-case timeout, which still caps the deadline. The formula only
+        models wire time, so commands without a size hint — anything with a
+        device-side processing delay — keep the worst-case timeout.
+        """
+        if expected_bytes is None:
+            return self.timeout
+        return min(self.timeout, max(0.05, expected_bytes * self.byte_time * 2.0))
 
     async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
         """Asynchronously open a TCP connection with the server."""
@@ -198,9 +293,5 @@ class SerialClient(Client):
         return reader, writer
 
 
-def _is_float(msg: Any) -> bool:
-    try:
-        float(msg)
-        return True
-    except ValueError:
-        return False
+def _is_float(msg: str) -> bool:
+    return _FLOAT_RE.match(msg) is not None
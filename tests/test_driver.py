@@ -58,6 +58,13 @@ async def test_set_standard_gas_number(gas):
         assert gas[0] == result['gas']
 
 
+async def test_get_many():
+    """Confirm concurrently polling multiple devices works."""
+    async with FlowController(ADDRESS) as device_a, FlowController(ADDRESS, 'B') as device_b:
+        results = await FlowController.get_many([device_a, device_b])
+        assert all('mass_flow' in result for result in results)
+
+
 async def test_get_firmware():
     """Confirm the firmware version can be read."""
     async with FlowController(ADDRESS) as device: